@@ -1,6 +1,8 @@
 from importlib import metadata as importlib_metadata
 
 from .flatten import pd_flatten
+from .lazy import LazyFlatFrame, pd_flatten_lazy
+from .unflatten import pd_unflatten
 
 
 def get_version() -> str:
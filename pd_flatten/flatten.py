@@ -2,6 +2,9 @@ from __future__ import annotations
 
 import pandas as pd
 
+# suffix of the columns recording each exploded value's position in its list
+LIST_POSITION = "_pos"
+
 
 def pd_flatten(
     df,
@@ -10,6 +13,7 @@ def pd_flatten(
     except_cols: list[str] | None = None,
     sep: str = "__",
     name_columns_with_parent: bool = True,
+    list_positions: bool = False,
 ) -> pd.DataFrame:
     """
     Flatten a data frame by recursively exploding lists to separate rows and expanding
@@ -22,12 +26,18 @@ def pd_flatten(
     :param sep: a separator character to use between `parent_key` and its column names
     :param name_columns_with_parent: whether to "namespace" nested column names using
     their parents' column names
+    :param list_positions: whether to record each exploded value's position in its list
+    in an extra column (named `f"{column}{sep}_pos"`, then `_pos1`, `_pos2`, etc. for
+    lists nested directly in lists), so that `pd_unflatten` can rebuild the lists
     :return: a flattened data frame
     """
 
     if except_cols is None:
         except_cols = []
 
+    pos_cols = []
+    pos_levels = {}
+
     def do_explode_lists(this_df: pd.DataFrame) -> pd.DataFrame:
         """
         Check each column of a data frame for lists and explode those values to separate
@@ -41,7 +51,27 @@ def pd_flatten(
             if c not in except_cols and bool(
                 this_df[c].apply(lambda x: isinstance(x, list)).any()
             ):
-                this_df = this_df.explode(c).reset_index(drop=True)
+                if not list_positions:
+                    this_df = this_df.explode(c).reset_index(drop=True)
+                    continue
+
+                # lists nested directly in lists get a position column for each level
+                level = pos_levels.get(c, 0)
+                pos_col = f"{c}{sep}{LIST_POSITION}{level or ''}"
+                pos_levels[c] = level + 1
+
+                this_df = this_df.assign(
+                    **{
+                        pos_col: this_df[c].apply(
+                            lambda x: list(range(len(x)))
+                            if isinstance(x, list)
+                            else None
+                        )
+                    }
+                )
+                this_df = this_df.explode([c, pos_col]).reset_index(drop=True)
+                this_df[pos_col] = this_df[pos_col].astype("Int64")
+                pos_cols.append(pos_col)
 
         return this_df
 
@@ -83,11 +113,21 @@ def pd_flatten(
 
         return this_df
 
+    def shape(this_df: pd.DataFrame) -> tuple[int, int]:
+        """
+        Get the shape of a data frame, not counting list position columns.
+
+        :param this_df: a data frame
+        :return: the number of rows and columns
+        """
+
+        return len(this_df), len(this_df.columns) - len(pos_cols)
+
     prev_shape = None
 
-    while prev_shape != df.shape:
+    while prev_shape != shape(df):
         # continue iterating until we the number of rows and cols is unchanged
-        prev_shape = df.shape
+        prev_shape = shape(df)
 
         if explode_lists:
             df = do_explode_lists(df)
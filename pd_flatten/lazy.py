@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .flatten import LIST_POSITION
+
+
+def _is_na(x: Any) -> bool:
+    """
+    Check whether a value is a scalar NA (e.g. `None` or `NaN`).
+
+    :param x: a value
+    :return: whether `x` is NA
+    """
+
+    if x is None:
+        return True
+
+    if isinstance(x, (str, int)):
+        # skip the slower checks below for the most common values
+        return False
+
+    return pd.api.types.is_scalar(x) and bool(pd.isna(x))
+
+
+class LazyFlatFrame:
+    """
+    A flattened view of a data frame whose columns are only extracted from the nested
+    source values when they're requested.
+
+    Constructing the view walks the nested values once to learn the flattened column
+    names and which source row (and list positions) each flattened row comes from, but
+    it doesn't expand, explode, or copy any column values. The schema follows the same
+    passes as `pd_flatten`, including stopping once a pass leaves the number of rows
+    and columns unchanged, and expanding a scalar among dictionaries to a `0` column, so
+    it has the same columns as `pd_flatten` would return.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        explode_lists: bool = True,
+        expand_dicts: bool = True,
+        except_cols: list[str] | None = None,
+        sep: str = "__",
+        name_columns_with_parent: bool = True,
+        list_positions: bool = False,
+    ) -> None:
+        """
+        Build the flattened schema of a data frame.
+
+        :param df: a data frame
+        :param explode_lists: whether to split lists to separate rows
+        :param expand_dicts: whether to split dictionaries to separate columns
+        :param except_cols: an optional list of columns to exclude from flattening
+        :param sep: a separator character to use between `parent_key` and its column
+        names
+        :param name_columns_with_parent: whether to "namespace" nested column names
+        using their parents' column names
+        :param list_positions: whether to add a column with each exploded value's
+        position in its list
+        """
+
+        if except_cols is None:
+            except_cols = []
+
+        self.df = df
+
+        # for each column path, the number of nested list levels, the dictionary keys
+        # found beneath each of those levels, and the levels holding dictionaries or
+        # (non-NA) scalars
+        self.list_levels: dict[tuple, int] = {}
+        self.dict_keys: dict[tuple, dict[int, dict[Any, None]]] = {}
+        self.dict_levels: set[tuple[tuple, int]] = set()
+        self.scalar_levels: set[tuple[tuple, int]] = set()
+
+        for c in df.columns:
+            for x in df[c]:
+                self._scan(x, (c,), 0)
+
+        # replay the passes of `pd_flatten` on the schema and row indices alone to get
+        # the order of the columns and the source of each flattened row
+        self.src = np.arange(len(df))
+        self.positions: dict[tuple[tuple, int], np.ndarray] = {}
+        self.explosions: list[tuple[tuple, int]] = []
+        self.columns: list[Any] = list(df.columns)
+        self._paths_by_name: dict[Any, tuple] = {c: (c,) for c in df.columns}
+        self._position_cols: dict[str, tuple[tuple, int]] = {}
+        levels_done: dict[tuple, int] = {}
+
+        def shape() -> tuple[int, int]:
+            return len(self.src), len(self.columns) - len(self._position_cols)
+
+        prev_shape = None
+
+        while prev_shape != shape():
+            # continue iterating until the number of rows and cols is unchanged, exactly
+            # as `pd_flatten` does
+            prev_shape = shape()
+
+            if explode_lists:
+                for c in list(self.columns):
+                    p = self._paths_by_name.get(c)
+
+                    if p is None or c in except_cols:
+                        continue
+
+                    done = levels_done.get(p, 0)
+
+                    if done >= self.list_levels.get(p, 0):
+                        continue
+
+                    self._explode(p, done)
+                    self.explosions.append((p, done))
+                    levels_done[p] = done + 1
+
+                    if list_positions:
+                        pos_col = f"{c}{sep}{LIST_POSITION}{done or ''}"
+                        self.columns.append(pos_col)
+                        self._position_cols[pos_col] = (p, done)
+
+            if expand_dicts:
+                for c in list(self.columns):
+                    p = self._paths_by_name.get(c)
+
+                    if p is None or c in except_cols:
+                        continue
+
+                    done = levels_done.get(p, 0)
+
+                    if (p, done) not in self.dict_levels:
+                        continue
+
+                    keys = self.dict_keys[p][done]
+
+                    if name_columns_with_parent:
+                        children = {f"{c}{sep}{k}": (*p, k) for k in keys}
+                    else:
+                        children = {k: (*p, k) for k in keys}
+
+                    dup_cols = set(self.columns).intersection(children)
+
+                    if len(dup_cols) > 0:
+                        raise NameError(
+                            f"Column names {dup_cols} on the column path `{c}` are "
+                            "duplicated. Try calling `pd_flatten_lazy` with "
+                            "`name_columns_with_parent=True`."
+                        )
+
+                    self.columns.remove(c)
+                    del self._paths_by_name[c]
+                    self.columns.extend(children)
+                    self._paths_by_name.update(children)
+
+    def __len__(self) -> int:
+        return len(self.src)
+
+    def __getitem__(self, key: str | list[str]) -> pd.Series | pd.DataFrame:
+        """
+        Materialize one flattened column as a series or several as a data frame.
+
+        :param key: a column name or a list of column names
+        :return: a series or a data frame
+        """
+
+        if isinstance(key, list):
+            return self.to_pandas(columns=key)
+
+        return self.to_pandas(columns=[key])[key]
+
+    def to_pandas(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Materialize the flattened data frame, extracting only the requested columns
+        from the nested source values.
+
+        :param columns: an optional list of flattened column names (defaults to all)
+        :return: a flattened data frame
+        """
+
+        if columns is None:
+            columns = self.columns
+
+        missing = [
+            c
+            for c in columns
+            if c not in self._paths_by_name and c not in self._position_cols
+        ]
+
+        if len(missing) > 0:
+            raise KeyError(f"Columns {missing} are not in the flattened data frame.")
+
+        if len(self.explosions) > 0:
+            index = pd.RangeIndex(len(self.src))
+        else:
+            index = self.df.index
+
+        data = {}
+
+        for c in columns:
+            if c in self._position_cols:
+                pos = self.positions[self._position_cols[c]]
+                data[c] = pd.Series(pos, index=index).astype("Int64").mask(pos < 0)
+                continue
+
+            p = self._paths_by_name[c]
+
+            exploded = any(q == p for q, _ in self.explosions)
+
+            if len(p) == 1 and not exploded:
+                # untouched top-level columns keep their dtype
+                data[c] = self.df[p[0]].iloc[self.src].set_axis(index)
+            elif exploded:
+                # exploded values stay `object`, as with `DataFrame.explode`
+                data[c] = pd.Series(self._extract(p), index=index, dtype="object")
+            else:
+                data[c] = pd.Series(self._extract(p), index=index)
+
+        return pd.DataFrame(data, index=index)
+
+    def _scan(self, x: Any, path: tuple, level: int) -> None:
+        """
+        Record the list levels and dictionary keys found in a nested value.
+
+        :param x: a nested value
+        :param path: the column path of the value
+        :param level: the number of list levels already descended at this path
+        """
+
+        if isinstance(x, list):
+            self.list_levels[path] = max(self.list_levels.get(path, 0), level + 1)
+
+            for e in x:
+                self._scan(e, path, level + 1)
+
+        elif isinstance(x, dict):
+            self.dict_levels.add((path, level))
+            keys = self.dict_keys.setdefault(path, {}).setdefault(level, {})
+
+            for k, v in x.items():
+                keys[k] = None
+                self._scan(v, (*path, k), 0)
+
+        elif (path, level) not in self.scalar_levels and not _is_na(x):
+            # `apply(pd.Series)` turns a scalar among dictionaries into a `0` column
+            self.scalar_levels.add((path, level))
+            self.dict_keys.setdefault(path, {}).setdefault(level, {}).setdefault(0)
+
+    def _explode(self, p: tuple, level: int) -> None:
+        """
+        Explode the lists at a column path on row indices alone, recording for each
+        flattened row its source row and its position in the list (-1 when the value
+        wasn't a list and -2 when the list was empty).
+
+        :param p: a column path
+        :param level: the number of list levels already exploded at this path
+        """
+
+        values = self._extract(p, max_level=level)
+
+        lengths = np.array(
+            [len(v) if isinstance(v, list) else 0 for v in values], dtype=np.int64
+        )
+        codes = np.array(
+            [-2 if isinstance(v, list) else -1 for v in values], dtype=np.int64
+        )
+        reps = np.maximum(lengths, 1)
+
+        # position of each new row within its list, as with `DataFrame.explode`
+        starts = np.cumsum(reps) - reps
+        pos = np.arange(reps.sum()) - np.repeat(starts, reps)
+        pos = np.where(np.repeat(lengths, reps) > 0, pos, np.repeat(codes, reps))
+
+        self.src = np.repeat(self.src, reps)
+        self.positions = {k: np.repeat(v, reps) for k, v in self.positions.items()}
+        self.positions[(p, level)] = pos
+
+    def _extract(self, path: tuple, max_level: int | None = None) -> list:
+        """
+        Extract the values at a column path for every flattened row, descending one
+        path component at a time across all rows.
+
+        :param path: a column path
+        :param max_level: an optional number of list levels to descend at the end of
+        the path (defaults to every exploded level)
+        :return: a list of values
+        """
+
+        values: list[Any] = self.df[path[0]].to_numpy(dtype="object")[self.src].tolist()
+
+        for i in range(len(path)):
+            if i > 0:
+                k = path[i]
+                values = [
+                    v.get(k, np.nan)
+                    if isinstance(v, dict)
+                    else (v if k == 0 and not _is_na(v) else np.nan)
+                    for v in values
+                ]
+
+            prefix = path[: i + 1]
+
+            for level in range(self.list_levels.get(prefix, 0)):
+                if (prefix, level) not in self.positions or (
+                    prefix == path and max_level is not None and level >= max_level
+                ):
+                    break
+
+                values = [
+                    v[j] if j >= 0 else (np.nan if j == -2 else v)
+                    for v, j in zip(values, self.positions[(prefix, level)].tolist())
+                ]
+
+        return values
+
+
+def pd_flatten_lazy(
+    df,
+    explode_lists: bool = True,
+    expand_dicts: bool = True,
+    except_cols: list[str] | None = None,
+    sep: str = "__",
+    name_columns_with_parent: bool = True,
+    list_positions: bool = False,
+) -> LazyFlatFrame:
+    """
+    Lazily flatten a data frame, deferring the extraction of each flattened column
+    until it's requested with `to_pandas(columns=[...])`. The columns and rows are the
+    same as those of `pd_flatten` called with the same arguments.
+
+    :param df: a data frame
+    :param explode_lists: whether to split lists to separate rows
+    :param expand_dicts: whether to split dictionaries to separate columns
+    :param except_cols: an optional list of columns to exclude from flattening
+    :param sep: a separator character to use between `parent_key` and its column names
+    :param name_columns_with_parent: whether to "namespace" nested column names using
+    their parents' column names
+    :param list_positions: whether to add a column with each exploded value's position
+    in its list
+    :return: a lazily flattened data frame
+    """
+
+    return LazyFlatFrame(
+        df,
+        explode_lists=explode_lists,
+        expand_dicts=expand_dicts,
+        except_cols=except_cols,
+        sep=sep,
+        name_columns_with_parent=name_columns_with_parent,
+        list_positions=list_positions,
+    )
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .flatten import LIST_POSITION
+
+
+def pd_unflatten(
+    df: pd.DataFrame,
+    list_cols: list[str] | None = None,
+    key: list[str] | None = None,
+    sep: str = "__",
+) -> pd.DataFrame:
+    """
+    Reverse `pd_flatten` by collapsing exploded rows back into lists and nesting
+    namespaced columns back into dictionaries.
+
+    The data frame must have been flattened with `name_columns_with_parent=True` so
+    that each column name encodes its nested path, and with `list_positions=True` so
+    that the rows of each list can be regrouped by their recorded positions rather than
+    by comparing values.
+
+    Without `key`, a new source row is assumed to start at every row where each list
+    position is 0 or missing, which requires that the exploded rows are still all
+    present and in their original order. Pass `key` after filtering or reordering rows.
+
+    Some values can't be told apart after flattening: an empty list and a missing list
+    both come back as `[]`, and a dictionary whose values are all NA comes back as
+    `None`. Lists nested directly in lists are rebuilt from their own position columns
+    (`_pos1`, `_pos2`, etc.).
+
+    :param df: a flattened data frame
+    :param list_cols: an optional list of column paths (e.g. `["a", "a__b"]`) that
+    held lists before flattening (defaults to every path with a list position column)
+    :param key: an optional list of columns that uniquely identify a source row
+    :param sep: the separator that was used between parent and nested column names
+    :return: an unflattened data frame
+    """
+
+    suffix = f"{sep}{LIST_POSITION}"
+    position_pattern = re.compile(f"{re.escape(suffix)}(\\d*)$")
+
+    def list_position(c: Any) -> tuple[str, int] | None:
+        """
+        Get the list path and level whose positions a column records, if any.
+
+        :param c: a column name
+        :return: the list path and level, or `None` if `c` isn't a list position column
+        """
+
+        if not isinstance(c, str):
+            return None
+
+        m = position_pattern.search(c)
+
+        if m is None:
+            return None
+
+        return c[: m.start()], int(m.group(1) or 0)
+
+    positions = {c: list_position(c) for c in df.columns}
+    pos_cols = [c for c, lp in positions.items() if lp is not None]
+    levels = [lp for lp in positions.values() if lp is not None]
+
+    if list_cols is None:
+        list_cols = list(dict.fromkeys(path for path, _ in levels))
+
+    for path in list_cols:
+        if (path, 0) not in levels:
+            raise NameError(
+                f"Column `{path}{suffix}` with the list positions of `{path}` is not in "
+                "the data frame. Try calling `pd_flatten` with `list_positions=True`."
+            )
+
+    def is_under(c: Any, path: str) -> bool:
+        """
+        Check whether a column lies on (or below) a nested column path.
+
+        :param c: a column name
+        :param path: a column path
+        :return: whether `c` is `path` or nested under it
+        """
+
+        return str(c) == path or str(c).startswith(f"{path}{sep}")
+
+    def is_nested(c: Any, prefix: str) -> bool:
+        """
+        Check whether a column holds values nested under a column path prefix.
+
+        :param c: a column name
+        :param prefix: a column path followed by `sep`
+        :return: whether `c` starts with `prefix` and isn't a list position column
+        """
+
+        return isinstance(c, str) and c.startswith(prefix) and positions.get(c) is None
+
+    def nest(this_df: pd.DataFrame, path: str) -> pd.Series:
+        """
+        Combine the columns nested under a column path into a single column of
+        dictionaries, building one child column at a time.
+
+        :param this_df: a data frame
+        :param path: a column path
+        :return: a series of dictionaries (or `None` where every value is NA)
+        """
+
+        prefix = f"{path}{sep}"
+
+        # the names of the immediate children of `path`, in column order, leaving out
+        # any list positions
+        children = list(
+            dict.fromkeys(
+                c[len(prefix) :].split(sep, 1)[0]
+                for c in this_df.columns
+                if is_nested(c, prefix)
+            )
+        )
+
+        values = []
+        all_na = np.ones(len(this_df), dtype=bool)
+
+        for child in children:
+            child_path = f"{prefix}{child}"
+
+            if any(is_nested(c, f"{child_path}{sep}") for c in this_df.columns):
+                s = nest(this_df, child_path)
+            else:
+                s = this_df[child_path]
+
+            values.append(s.tolist())
+            all_na &= s.isna().to_numpy()
+
+        return pd.Series(
+            [
+                None if na else dict(zip(children, vals))
+                for na, vals in zip(all_na.tolist(), zip(*values))
+            ],
+            index=this_df.index,
+            dtype="object",
+        )
+
+    def collapse_list(
+        this_df: pd.DataFrame, src: np.ndarray, path: str, level: int
+    ) -> tuple[pd.DataFrame, np.ndarray]:
+        """
+        Regroup the rows that were exploded from one level of a list column path into
+        one row per list.
+
+        :param this_df: a data frame
+        :param src: the source row of each row
+        :param path: a column path that held a list
+        :param level: the number of lists that this one was nested directly inside
+        :return: the data frame with the path's columns collapsed into a list column,
+        and the source row of each of its rows
+        """
+
+        pos_col = f"{path}{suffix}{level or ''}"
+        members = [
+            c for c in this_df.columns if is_under(c, path) and positions.get(c) is None
+        ]
+
+        if len(members) == 0:
+            raise NameError(f"Column path `{path}` is not in the data frame.")
+
+        is_scalar = len(members) == 1 and str(members[0]) == path
+
+        if is_scalar:
+            name = members[0]
+            elements = this_df[name]
+        else:
+            name = path
+            elements = nest(this_df, path)
+
+        # rows belonging to the same list come from the same source row and sit at the
+        # same positions of every other list that hasn't been collapsed yet, including
+        # the lists that this one is nested directly inside
+        others = [
+            c
+            for c in this_df.columns
+            if not is_under(c, path)
+            or positions.get(c) in {(path, i) for i in range(level)}
+        ]
+        by = pd.DataFrame({c: this_df[c] for c in others if c in pos_cols})
+        by.insert(0, "src", src)
+
+        codes = by.groupby(list(by.columns), sort=False, dropna=False).ngroup()
+        codes = codes.to_numpy()
+
+        # group codes are numbered in order of first appearance, so the first row of
+        # each group lines up with its collapsed list
+        first_rows = ~pd.Series(codes).duplicated().to_numpy()
+
+        # sort rows by group and then by list position so that each list is a
+        # contiguous slice (a missing position means the list was empty or missing, or
+        # that a scalar value was left in place of a list)
+        list_pos = this_df[pos_col].fillna(-1).to_numpy(dtype=np.int64)
+        order = np.lexsort((list_pos, codes))
+        counts = np.bincount(codes)
+        ends = np.cumsum(counts)
+        starts = ends - counts
+
+        is_list = list_pos[order][starts] >= 0
+        sorted_elements = elements.to_numpy(dtype="object")[order].tolist()
+        is_kept = elements.notna().to_numpy()[order][starts] & is_scalar
+        lists = [
+            sorted_elements[i:j] if e else (sorted_elements[i] if k else [])
+            for e, k, i, j in zip(
+                is_list.tolist(), is_kept.tolist(), starts.tolist(), ends.tolist()
+            )
+        ]
+
+        pos = this_df.columns.get_loc(members[0])
+        assert isinstance(pos, int)
+        pos -= sum(1 for c in this_df.columns[:pos] if c not in others)
+
+        this_df = this_df.loc[first_rows, others].reset_index(drop=True)
+        this_df.insert(pos, name, pd.Series(lists, dtype="object"))
+
+        return this_df, src[first_rows]
+
+    if key is not None:
+        src = df.groupby(key, sort=False, dropna=False).ngroup().to_numpy()
+    elif len(pos_cols) > 0:
+        # a source row starts where every list is at its first value (or is empty)
+        starts = (df[pos_cols].fillna(0) == 0).all(axis=1).to_numpy()
+        src = np.cumsum(starts)
+    else:
+        src = np.arange(len(df))
+
+    # collapse the most deeply nested lists first, starting with the innermost level
+    # of lists nested directly in lists
+    to_collapse = [(path, level) for path, level in levels if path in list_cols]
+
+    for path, level in sorted(
+        to_collapse, key=lambda x: (x[0].count(sep), x[1]), reverse=True
+    ):
+        df, src = collapse_list(df, src, path, level)
+
+    # drop the positions of any lists that weren't collapsed
+    df = df.drop(columns=[c for c in df.columns if positions.get(c) is not None])
+
+    # nest the remaining namespaced columns into dictionaries
+    parents = list(
+        dict.fromkeys(
+            c.split(sep, 1)[0] for c in df.columns if isinstance(c, str) and sep in c
+        )
+    )
+
+    for parent in parents:
+        members = [c for c in df.columns if is_nested(c, f"{parent}{sep}")]
+        pos = df.columns.get_loc(members[0])
+        assert isinstance(pos, int)
+
+        nested = nest(df, parent)
+        df = df.drop(columns=members)
+        df.insert(pos, parent, nested)
+
+    return df
@@ -78,6 +78,30 @@ class TestListExplosion:
         pd.testing.assert_frame_equal(observed, expected)
 
 
+class TestListPositions:
+    def test_single_nested_list(self):
+        df = pd.DataFrame([{"a": 0, "b": [{"i": 1}, {"i": 2}]}, {"a": 1, "b": []}])
+
+        observed = pd_flatten(df, list_positions=True)
+        expected = pd.DataFrame(
+            [
+                {"a": 0, "b___pos": 0, "b__i": 1},
+                {"a": 0, "b___pos": 1, "b__i": 2},
+                {"a": 1, "b___pos": None, "b__i": None},
+            ]
+        ).astype({"b___pos": "Int64"})
+
+        pd.testing.assert_frame_equal(observed, expected)
+
+    def test_shape_ignores_positions(self):
+        df = pd.DataFrame([{"a": 0, "b": [{"i": {"j": 1}}]}])
+
+        observed = pd_flatten(df, list_positions=True).drop(columns=["b___pos"])
+        expected = pd_flatten(df)
+
+        pd.testing.assert_frame_equal(observed, expected)
+
+
 class TestExcludedColumns:
     def test_single_nested(self):
         df = pd.DataFrame([{"a": 0, "b": {"i": 1, "j": 2}}])
@@ -0,0 +1,127 @@
+import pandas as pd
+import pytest
+
+from pd_flatten import pd_flatten, pd_flatten_lazy
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        [
+            {
+                "a": 0,
+                "b": [1, 2],
+                "c": [
+                    {"i": 3, "d": [{"x": 1}, {"x": 2}]},
+                    {"i": 4, "d": []},
+                ],
+                "e": {"f": 5, "g": {"h": 6}},
+            },
+            {"a": 1, "b": [], "c": None, "e": None},
+        ]
+    )
+
+
+@pytest.fixture
+def mixed_df():
+    # a column mixing dictionaries and scalars, which `pd_flatten` expands to a `0`
+    # column alongside the dictionary keys
+    return pd.DataFrame([{"a": 0, "b": {"x": 1}}, {"a": 1, "b": 5}])
+
+
+class TestSchema:
+    def test_columns(self, df):
+        observed = pd_flatten_lazy(df)
+
+        assert observed.columns == list(pd_flatten(df.copy()).columns)
+        assert len(observed) == len(pd_flatten(df.copy()))
+
+    def test_excluded_columns(self, df):
+        observed = pd_flatten_lazy(df, except_cols=["c", "e__g"])
+
+        assert observed.columns == ["a", "b", "c", "e__f", "e__g"]
+
+    def test_stops_like_pd_flatten(self):
+        df = pd.DataFrame([{"a": {"b": {"c": 1}}}])
+
+        observed = pd_flatten_lazy(df)
+
+        assert observed.columns == ["a__b"] == list(pd_flatten(df.copy()).columns)
+
+    def test_stops_like_pd_flatten_without_parent(self):
+        df = pd.DataFrame([{"a": 0, "b": {"c": {"d": 1}}}])
+
+        observed = pd_flatten_lazy(df, name_columns_with_parent=False)
+        expected = pd_flatten(df.copy(), name_columns_with_parent=False)
+
+        assert observed.columns == ["a", "c"] == list(expected.columns)
+
+    def test_list_positions(self, df):
+        observed = pd_flatten_lazy(df, list_positions=True)
+        expected = pd_flatten(df.copy(), list_positions=True)
+
+        assert observed.columns == list(expected.columns)
+        pd.testing.assert_frame_equal(
+            observed.to_pandas(columns=["c__d___pos"]), expected[["c__d___pos"]]
+        )
+
+    def test_list_positions_of_lists_of_lists(self):
+        df = pd.DataFrame([{"a": 0, "b": [[1, 2], [3]]}, {"a": 1, "b": [[4]]}])
+
+        observed = pd_flatten_lazy(df, list_positions=True).to_pandas()
+        expected = pd_flatten(df.copy(), list_positions=True)
+
+        assert list(observed.columns) == ["a", "b", "b___pos", "b___pos1"]
+        pd.testing.assert_frame_equal(observed, expected)
+
+    def test_error_when_naming_without_parent(self):
+        df = pd.DataFrame([{"a": 0, "b": {"i": 1, "a": 2}}])
+
+        with pytest.raises(
+            NameError, match="Column names {'a'} on the column path `b` are duplicated"
+        ):
+            _ = pd_flatten_lazy(df, name_columns_with_parent=False)
+
+
+class TestToPandas:
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {},
+            {"sep": "."},
+            {"explode_lists": False},
+            {"expand_dicts": False},
+            {"except_cols": ["c"]},
+            {"list_positions": True},
+        ],
+    )
+    @pytest.mark.parametrize("data", ["df", "mixed_df"])
+    def test_matches_pd_flatten(self, request, data, kwargs):
+        df = request.getfixturevalue(data)
+
+        observed = pd_flatten_lazy(df, **kwargs).to_pandas()
+        expected = pd_flatten(df.copy(), **kwargs)
+
+        pd.testing.assert_frame_equal(observed, expected)
+
+    def test_subset_of_columns(self, df):
+        observed = pd_flatten_lazy(df).to_pandas(columns=["c__d__x", "a"])
+        expected = pd_flatten(df.copy())[["c__d__x", "a"]]
+
+        pd.testing.assert_frame_equal(observed, expected)
+
+    def test_single_column(self, df):
+        observed = pd_flatten_lazy(df)["e__g__h"]
+        expected = pd_flatten(df.copy())["e__g__h"]
+
+        pd.testing.assert_series_equal(observed, expected)
+
+    def test_mixed_dicts_and_scalars(self, mixed_df):
+        observed = pd_flatten_lazy(mixed_df)
+
+        assert observed.columns == ["a", "b__x", "b__0"]
+        assert observed["b__0"].tolist()[1] == 5
+
+    def test_missing_column(self, df):
+        with pytest.raises(KeyError, match="Columns \\['z'\\] are not in"):
+            _ = pd_flatten_lazy(df).to_pandas(columns=["z"])
@@ -0,0 +1,141 @@
+import pandas as pd
+import pytest
+
+from pd_flatten import pd_flatten, pd_unflatten
+
+
+def round_trip(df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    flattened = pd_flatten(df.copy(), list_positions=True)
+    return pd_unflatten(flattened, **kwargs).loc[:, df.columns]
+
+
+class TestNesting:
+    def test_single_nested(self):
+        df = pd.DataFrame([{"a": 0, "b__i": 1, "b__j": 2}])
+
+        observed = pd_unflatten(df)
+        expected = pd.DataFrame([{"a": 0, "b": {"i": 1, "j": 2}}])
+
+        pd.testing.assert_frame_equal(observed, expected)
+
+    def test_double_nested(self):
+        df = pd.DataFrame([{"a": 0, "b.i": 1, "b.j.k": 2, "b.j.l": 3}])
+
+        observed = pd_unflatten(df, sep=".")
+        expected = pd.DataFrame([{"a": 0, "b": {"i": 1, "j": {"k": 2, "l": 3}}}])
+
+        pd.testing.assert_frame_equal(observed, expected)
+
+    def test_all_na_dict(self):
+        df = pd.DataFrame([{"a": 0, "b__i": 1}, {"a": 1, "b__i": None}])
+
+        observed = pd_unflatten(df)
+        expected = pd.DataFrame([{"a": 0, "b": {"i": 1.0}}, {"a": 1, "b": None}])
+
+        pd.testing.assert_frame_equal(observed, expected)
+
+
+class TestListCollapse:
+    def test_single_nested_list(self):
+        df = pd.DataFrame([{"a": 0, "b": [{"i": 1}, {"i": 2}]}])
+
+        pd.testing.assert_frame_equal(round_trip(df), df)
+
+    def test_list_of_scalars(self):
+        df = pd.DataFrame([{"a": 0, "b": [1, 2]}, {"a": 1, "b": [3]}])
+
+        pd.testing.assert_frame_equal(round_trip(df), df)
+
+    def test_empty_list(self):
+        df = pd.DataFrame([{"a": 0, "b": [{"i": 1}]}, {"a": 1, "b": []}])
+
+        pd.testing.assert_frame_equal(round_trip(df), df)
+
+    def test_list_of_na(self):
+        df = pd.DataFrame([{"a": 0, "b": [None]}, {"a": 1, "b": []}])
+
+        pd.testing.assert_frame_equal(round_trip(df), df)
+
+    def test_sibling_lists_with_duplicates(self):
+        df = pd.DataFrame([{"a": 0, "b": [1, 2], "c": [3, 3]}])
+
+        pd.testing.assert_frame_equal(round_trip(df), df)
+        pd.testing.assert_frame_equal(round_trip(df, key=["a"]), df)
+
+    def test_nested_lists_with_duplicates(self):
+        df = pd.DataFrame(
+            [{"id": 0, "c": [{"x": 1, "p": [1]}, {"x": 1, "p": [2]}]}] * 2
+        )
+
+        pd.testing.assert_frame_equal(round_trip(df), df)
+        pd.testing.assert_frame_equal(
+            round_trip(df.assign(id=[0, 1]), key=["id"]), df.assign(id=[0, 1])
+        )
+
+    def test_key_after_filtering(self):
+        df = pd.DataFrame([{"a": 0, "b": [1, 2]}, {"a": 1, "b": [3, 4]}])
+
+        flattened = pd_flatten(df.copy(), list_positions=True)
+        flattened = flattened.loc[flattened["b"] != 3]
+
+        observed = pd_unflatten(flattened, key=["a"])
+        expected = pd.DataFrame([{"a": 0, "b": [1, 2]}, {"a": 1, "b": [4]}])
+
+        pd.testing.assert_frame_equal(observed, expected)
+
+    def test_unhashable_columns(self):
+        df = pd.DataFrame([{"a": 0, "t": [1, 2], "d": {"e": 1}, "b": [3, 4]}])
+
+        flattened = pd_flatten(df.copy(), except_cols=["t", "d"], list_positions=True)
+        observed = pd_unflatten(flattened).loc[:, df.columns]
+
+        pd.testing.assert_frame_equal(observed, df)
+
+    def test_lists_of_lists(self):
+        df = pd.DataFrame([{"a": 0, "b": [[1, 2], [3]]}, {"a": 1, "b": [[4]]}])
+
+        pd.testing.assert_frame_equal(round_trip(df), df)
+        pd.testing.assert_frame_equal(round_trip(df, key=["a"]), df)
+
+    def test_lists_of_lists_of_dicts(self):
+        df = pd.DataFrame(
+            [
+                {"a": 0, "b": [[{"c": [1, 1]}], [{"c": []}]]},
+                {"a": 1, "b": []},
+            ]
+        )
+
+        pd.testing.assert_frame_equal(round_trip(df), df)
+
+    def test_non_string_column_names(self):
+        df = pd.DataFrame([[0, [1, 2]], [1, [3]]])
+
+        pd.testing.assert_frame_equal(round_trip(df), df)
+
+    def test_missing_positions(self):
+        df = pd.DataFrame([{"a": 0, "b__i": 1}])
+
+        with pytest.raises(NameError, match="Column `b___pos` with the list positions"):
+            _ = pd_unflatten(df, list_cols=["b"])
+
+
+class TestRoundTrip:
+    def test_nested_lists(self):
+        df = pd.DataFrame(
+            [
+                {
+                    "id": "x",
+                    "conditions": [
+                        {"cid": "x1", "profiles": [{"pid": 1}, {"pid": 2}]},
+                        {"cid": "x2", "profiles": [{"pid": 3}]},
+                    ],
+                },
+                {
+                    "id": "y",
+                    "conditions": [{"cid": "y1", "profiles": [{"pid": 4}]}],
+                },
+            ]
+        )
+
+        pd.testing.assert_frame_equal(round_trip(df), df)
+        pd.testing.assert_frame_equal(round_trip(df, key=["id"]), df)